@@ -12,6 +12,7 @@ from albumentations import (
     Compose, Normalize, RandomRain, RandomBrightness, RandomShadow, RandomSnow, RandomFog, RandomSunFlare
 )
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from utils.logger import logger
 from traceback import print_exc
 
@@ -45,7 +46,7 @@ class Brain:
         self.motors = actuators.get_motor('motors_0')
         self.handler = handler
         self.config = config
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.gpu_inference = True if tf.test.gpu_device_name() else False
 
         self.threshold_image = np.zeros((640, 360, 3), np.uint8)
@@ -2,6 +2,7 @@ from torchvision import transforms
 from PIL import Image
 from brains.f1.torch_utils.pilotnet import PilotNet
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from os import path
 
 import numpy as np
@@ -39,7 +40,7 @@ class Brain:
         self.bird_eye_view = sensors.get_bird_eye_view('bird_eye_view_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.gpu_inference = config['GPU']
         self.device = torch.device('cuda' if (torch.cuda.is_available() and self.gpu_inference) else 'cpu')
         self.first_image = None
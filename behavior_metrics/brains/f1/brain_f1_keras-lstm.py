@@ -16,6 +16,7 @@ import time
 import os
 
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from os import path
 from albumentations import (
     Compose, HorizontalFlip, RandomBrightnessContrast, 
@@ -43,7 +44,7 @@ class Brain:
         self.camera = sensors.get_camera('camera_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.gpu_inference = True if tf.test.gpu_device_name() else False
         self.previous_images = np.zeros((1, 50, 100, 3))
         print(self.previous_images.shape)
@@ -20,6 +20,7 @@ from albumentations import (
 )
 from os import path
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from utils.gradcam.gradcam import GradCAM
 
 PRETRAINED_MODELS = ROOT_PATH + '/' + PRETRAINED_MODELS_DIR + 'tf_models/'
@@ -43,7 +44,7 @@ class Brain:
         self.camera = sensors.get_camera('camera_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.config = config
 
         self.suddenness_distance = []
@@ -205,7 +206,7 @@ class Brain:
                 self.motors.sendV(prediction_v)
                 self.motors.sendW(prediction_w)
 
-            self.update_frame('frame_3', base_image, inference_time=self.inference_times[-1])
+            self.update_frame('frame_3', base_image, inference_time=self.inference_times.last)
 
             current_w_normalized = prediction_w
             if self.previous_v != None:
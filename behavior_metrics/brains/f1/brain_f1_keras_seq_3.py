@@ -17,6 +17,7 @@ import os
 import tensorflow as tf
 
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from os import path
 from albumentations import (
     Compose, Normalize
@@ -44,7 +45,7 @@ class Brain:
         self.camera = sensors.get_camera('camera_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.config = config
 
         self.third_image = []
@@ -19,6 +19,7 @@ import os
 from PIL import Image
 from brains.f1.torch_utils.deepest_lstm_tinypilotnet import DeepestLSTMTinyPilotNet
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from os import path
 from albumentations import (
     Compose, Normalize
@@ -46,7 +47,7 @@ class Brain:
         self.camera = sensors.get_camera('camera_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.device = torch.device("cpu")
         self.gpu_inference = torch.cuda.is_available()
         self.transformations = transforms.Compose([
@@ -19,6 +19,7 @@ import os
 from PIL import Image
 from brains.f1.torch_utils.pilotnetStacked import PilotNet
 from utils.constants import PRETRAINED_MODELS_DIR, ROOT_PATH
+from utils.running_mean import RunningMean
 from os import path
 from collections import deque
 
@@ -43,7 +44,7 @@ class Brain:
         self.camera = sensors.get_camera('camera_0')
         self.handler = handler
         self.cont = 0
-        self.inference_times = []
+        self.inference_times = RunningMean(skip_first=10, skip_last=10)
         self.device = torch.device("cpu")
 
         self.gpu_inference = torch.cuda.is_available()
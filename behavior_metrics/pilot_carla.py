@@ -18,13 +18,12 @@ import rospy
 import subprocess
 import os
 
-from datetime import datetime
 from brains.brains_handler import Brains
 from robot.actuators import Actuators
 from robot.sensors import Sensors
 from utils.logger import logger
 from utils.constants import MIN_EXPERIMENT_PERCENTAGE_COMPLETED
-from rosgraph_msgs.msg import Clock
+from utils.running_mean import RunningMean
 from carla_msgs.msg import CarlaControl
 
 import numpy as np
@@ -68,23 +67,22 @@ class PilotCarla(threading.Thread):
         self.sensors = None
         self.actuators = None
         self.brains = None
+        self.active_brain = None
         self.experiment_model = experiment_model
         self.initialize_robot()
         self.pose3d = self.sensors.get_pose3d('pose3d_0')
         self.start_pose = np.array([self.pose3d.getPose3d().x, self.pose3d.getPose3d().y])
-        self.previous = datetime.now()
         self.checkpoints = []
         self.metrics = {}
         self.checkpoint_save = False
         self.max_distance = 0.5
+        self.max_distance_sq = self.max_distance ** 2
+        self.start_x, self.start_y = float(self.start_pose[0]), float(self.start_pose[1])
         self.execution_completed = False
-        self.stats_thread = threading.Thread(target=self.track_stats)
-        self.stats_thread.start()
-        self.ros_clock_time = 0
         self.real_time_factor = 0
-        self.brain_iterations_real_time = []
-        self.brain_iterations_simulated_time = []
-        self.real_time_factors = []
+        self.brain_iterations_real_time = RunningMean()
+        self.brain_iterations_simulated_time = RunningMean()
+        self.real_time_factors = RunningMean()
         self.real_time_update_rate = 1000
         self.pilot_start_time = 0
         self.time_cycle = self.configuration.pilot_time_cycle
@@ -105,6 +103,7 @@ class PilotCarla(threading.Thread):
         else:
             self.brains = Brains(self.sensors, self.actuators, self.brain_path, self.controller,
                                  config=self.configuration.brain_kwargs)
+        self.active_brain = getattr(self.brains, 'active_brain', None)
         self.__wait_carla()
 
     def stop_interfaces(self):
@@ -118,10 +117,11 @@ class PilotCarla(threading.Thread):
     def run(self):
         """Main loop of the class. Calls a brain action every self.time_cycle"""
         "TODO: cleanup measure of ips"
-        self.brain_iterations_simulated_time = []
-        self.real_time_factors = []
+        self.brain_iterations_simulated_time.clear()
+        self.real_time_factors.clear()
         self.sensors.get_camera('camera_0').total_frames = 0
-        self.pilot_start_time = time.time()
+        self.pilot_start_time = time.monotonic()
+        time_cycle_ns = int(self.time_cycle * 1e6)
 
         control_pub = rospy.Publisher('/carla/control', CarlaControl, queue_size=1)
         control_command = CarlaControl()
@@ -135,11 +135,12 @@ class PilotCarla(threading.Thread):
                 control_command.command = 2
                 control_pub.publish(control_command)
 
-                start_time = datetime.now()
+                start_time = time.monotonic_ns()
                 start_time_ros = self.ros_clock_time
                 self.execution_completed = False
+                brain = self.active_brain
                 try:
-                    self.brains.active_brain.execute()
+                    brain.execute()
                 except AttributeError as e:
                     logger.warning('No Brain selected')
                     logger.error(e)
@@ -150,13 +151,16 @@ class PilotCarla(threading.Thread):
                     self.kill()
                     os._exit(-1)
 
-                dt = datetime.now() - start_time
-                ms = (dt.days * 24 * 60 * 60 + dt.seconds) * 1000 + dt.microseconds / 1000.0
-                self.brain_iterations_real_time.append(ms / 1000)
-                if ms < self.time_cycle:
-                    time.sleep((self.time_cycle - ms) / 1000.0)
+                elapsed_ns = time.monotonic_ns() - start_time
+                self.brain_iterations_real_time.append(elapsed_ns / 1e9)
+                if elapsed_ns < time_cycle_ns:
+                    # Waiting on the kill event lets kill() end the cycle right away
+                    self.kill_event.wait((time_cycle_ns - elapsed_ns) / 1e9)
                 self.real_time_factors.append(self.real_time_factor)
                 self.brain_iterations_simulated_time.append(self.ros_clock_time - start_time_ros)
+            else:
+                # Paused: block for a cycle instead of spinning on stop_event
+                self.kill_event.wait(self.time_cycle / 1000)
         self.execution_completed = True
         self.kill()
         logger.info('Pilot: pilot killed.')
@@ -189,20 +193,15 @@ class PilotCarla(threading.Thread):
             brain_path {str} -- Path to the brain module to load.
         """
         self.brains.load_brain(brain_path, model=model)
+        self.active_brain = self.brains.active_brain
 
     def finish_line(self):
         pose = self.pose3d.getPose3d()
-        current_point = np.array([pose.x, pose.y])
-
-        dist = (self.start_pose - current_point) ** 2
-        dist = np.sum(dist, axis=0)
-        dist = np.sqrt(dist)
-        if dist < self.max_distance:
-            return True
-        return False
-
-    def clock_callback(self, clock_data):
-        self.ros_clock_time = clock_data.clock.to_sec()
-
-    def track_stats(self):
-        self.clock_subscriber = rospy.Subscriber("/clock", Clock, self.clock_callback)
+        dx = pose.x - self.start_x
+        dy = pose.y - self.start_y
+        return dx * dx + dy * dy < self.max_distance_sq
+
+    @property
+    def ros_clock_time(self):
+        """Current ROS time in seconds, taken from /clock by rospy when use_sim_time is set"""
+        return rospy.get_rostime().to_sec()
@@ -18,13 +18,12 @@ import rospy
 import subprocess
 import traceback
 
-from datetime import datetime
 from brains.brains_handler import Brains
 from robot.actuators import Actuators
 from robot.sensors import Sensors
 from utils.logger import logger
 from utils.constants import MIN_EXPERIMENT_PERCENTAGE_COMPLETED
-from rosgraph_msgs.msg import Clock
+from utils.running_mean import RunningMean
 
 import numpy as np
 
@@ -67,6 +66,7 @@ class PilotGazebo(threading.Thread):
         self.sensors = None
         self.actuators = None
         self.brains = None
+        self.active_brain = None
         self.initialize_robot()
         if self.robot_type == 'drone':
             self.pose3d = self.brains.active_brain.getPose3d()
@@ -74,19 +74,19 @@ class PilotGazebo(threading.Thread):
         else:
             self.pose3d = self.sensors.get_pose3d('pose3d_0')
             self.start_pose = np.array([self.pose3d.getPose3d().x, self.pose3d.getPose3d().y])
-        self.previous = datetime.now()
         self.checkpoints = []
         self.metrics = {}
         self.checkpoint_save = False
         self.max_distance = 0.5
+        self.max_distance_sq = self.max_distance ** 2
+        self.start_x, self.start_y = float(self.start_pose[0]), float(self.start_pose[1])
         self.execution_completed = False
         self.stats_thread = threading.Thread(target=self.track_stats)
         self.stats_thread.start()
-        self.ros_clock_time = 0
         self.real_time_factor = 0
-        self.brain_iterations_real_time = []
-        self.brain_iterations_simulated_time = []
-        self.real_time_factors = []
+        self.brain_iterations_real_time = RunningMean()
+        self.brain_iterations_simulated_time = RunningMean()
+        self.real_time_factors = RunningMean()
         self.real_time_update_rate = 1000
         self.pilot_start_time = 0
         self.time_cycle = self.configuration.pilot_time_cycle
@@ -109,6 +109,7 @@ class PilotGazebo(threading.Thread):
         else:
             self.brains = Brains(self.sensors, self.actuators, self.brain_path, self.controller,
                                  config=self.configuration.brain_kwargs)
+        self.active_brain = getattr(self.brains, 'active_brain', None)
         self.__wait_gazebo()
 
     def stop_interfaces(self):
@@ -122,40 +123,36 @@ class PilotGazebo(threading.Thread):
     def run(self):
         """Main loop of the class. Calls a brain action every self.time_cycle"""
         "TODO: cleanup measure of ips"
-        it = 0
-        ss = time.time()
-        self.brain_iterations_real_time = []
-        self.brain_iterations_simulated_time = []
-        self.real_time_factors = []
+        self.brain_iterations_real_time.clear()
+        self.brain_iterations_simulated_time.clear()
+        self.real_time_factors.clear()
         self.sensors.get_camera('camera_0').total_frames = 0
-        self.pilot_start_time = time.time()
+        self.pilot_start_time = time.monotonic()
+        time_cycle_ns = int(self.time_cycle * 1e6)
         while not self.kill_event.is_set():
             if not self.stop_event.is_set():
-                start_time = datetime.now()
+                start_time = time.monotonic_ns()
                 start_time_ros = self.ros_clock_time
                 self.execution_completed = False
+                brain = self.active_brain
                 try:
-                    self.brains.active_brain.execute()
+                    brain.execute()
                 except AttributeError as e:
                     traceback.print_exc()
                     logger.warning('No Brain selected')
                     logger.error(e)
 
-                dt = datetime.now() - start_time
-                ms = (dt.days * 24 * 60 * 60 + dt.seconds) * 1000 + dt.microseconds / 1000.0
-                self.brain_iterations_real_time.append(ms / 1000)
-                elapsed = time.time() - ss
-                if elapsed < 1:
-                    it += 1
-                else:
-                    ss = time.time()
-                    it = 0
-                if ms < self.time_cycle:
-                    time.sleep((self.time_cycle - ms) / 1000.0)
+                elapsed_ns = time.monotonic_ns() - start_time
+                self.brain_iterations_real_time.append(elapsed_ns / 1e9)
+                if elapsed_ns < time_cycle_ns:
+                    # Waiting on the kill event lets kill() end the cycle right away
+                    self.kill_event.wait((time_cycle_ns - elapsed_ns) / 1e9)
                 self.real_time_factors.append(self.real_time_factor)
                 self.brain_iterations_simulated_time.append(self.ros_clock_time - start_time_ros)
+            else:
+                # Paused: block for a cycle instead of spinning on stop_event
+                self.kill_event.wait(self.time_cycle / 1000)
         self.execution_completed = True
-        self.clock_subscriber.unregister()
         self.stats_process.terminate()
         poll = self.stats_process.poll()
         while poll is None:
@@ -192,22 +189,22 @@ class PilotGazebo(threading.Thread):
             brain_path {str} -- Path to the brain module to load.
         """
         self.brains.load_brain(brain_path, model=model)
+        self.active_brain = self.brains.active_brain
 
     def finish_line(self):
         pose = self.pose3d.getPose3d()
-        current_point = np.array([pose.x, pose.y])
-
-        dist = (self.start_pose - current_point) ** 2
-        dist = np.sum(dist, axis=0)
-        dist = np.sqrt(dist)
-        if dist < self.max_distance:
-            return True
-        return False
+        dx = pose.x - self.start_x
+        dy = pose.y - self.start_y
+        return dx * dx + dy * dy < self.max_distance_sq
 
     def calculate_metrics(self, experiment_metrics):
         if hasattr(self.brains.active_brain, 'inference_times'):
-            self.brains.active_brain.inference_times = self.brains.active_brain.inference_times[10:-10]
-            mean_inference_time = sum(self.brains.active_brain.inference_times) / len(self.brains.active_brain.inference_times)
+            inference_times = self.brains.active_brain.inference_times
+            if len(inference_times):
+                mean_inference_time = inference_times.mean()
+            else:
+                logger.warning('Not enough inference samples to compute the mean network inference time')
+                mean_inference_time = 0
             frame_rate = self.sensors.get_camera('camera_0').total_frames / experiment_metrics['experiment_total_simulated_time']
             gpu_inference = self.brains.active_brain.gpu_inference
             real_time_update_rate = self.real_time_update_rate
@@ -222,11 +219,11 @@ class PilotGazebo(threading.Thread):
             first_image = None
             logger.info('No deep learning based brain')
         if self.brain_iterations_real_time and self.brain_iterations_simulated_time and self.brain_iterations_simulated_time:
-            mean_brain_iterations_simulated_time = sum(self.brain_iterations_simulated_time) / len(self.brain_iterations_simulated_time)
-            real_time_factor = sum(self.real_time_factors) / len(self.real_time_factors)
+            mean_brain_iterations_simulated_time = self.brain_iterations_simulated_time.mean()
+            real_time_factor = self.real_time_factors.mean()
             brain_iterations_frequency_simulated_time = 1 / mean_brain_iterations_simulated_time
             target_brain_iterations_simulated_time = 1000 / self.time_cycle / round(real_time_factor, 2)
-            mean_brain_iterations_real_time = sum(self.brain_iterations_real_time) / len(self.brain_iterations_real_time)
+            mean_brain_iterations_real_time = self.brain_iterations_real_time.mean()
             brain_iterations_frequency_real_time = 1 / mean_brain_iterations_real_time
             target_brain_iterations_real_time = 1 / (self.time_cycle / 1000)
             suddenness_distance = sum(self.brains.active_brain.suddenness_distance) / len(self.brains.active_brain.suddenness_distance)
@@ -265,8 +262,10 @@ class PilotGazebo(threading.Thread):
         logger.info('Saving metrics to ROS bag')
         return experiment_metrics, first_image
 
-    def clock_callback(self, clock_data):
-        self.ros_clock_time = clock_data.clock.to_sec()
+    @property
+    def ros_clock_time(self):
+        """Current ROS time in seconds, taken from /clock by rospy when use_sim_time is set"""
+        return rospy.get_rostime().to_sec()
 
     def track_stats(self):
         args = ["gz", "stats", "-p"]
@@ -280,7 +279,6 @@ class PilotGazebo(threading.Thread):
             time.sleep(1)
             poll = self.stats_process.poll()
 
-        self.clock_subscriber = rospy.Subscriber("/clock", Clock, self.clock_callback)
         with self.stats_process.stdout:
             for line in iter(self.stats_process.stdout.readline, b''):
                 stats_list = [x.strip() for x in line.split(b',')]
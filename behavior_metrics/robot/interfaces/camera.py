@@ -1,4 +1,5 @@
 import threading
+import cv2
 import numpy as np
 import rospy
 
@@ -8,6 +9,13 @@ from sensor_msgs.msg import Image as ImageROS
 MAXRANGE = 8  # max length received from imageD
 MINRANGE = 0
 
+# Encodings decoded straight from the message buffer: (channels, OpenCV conversion to RGB or None if already RGB)
+RGB8_CONVERSIONS = {
+    'rgb8': (3, None),
+    'bgr8': (3, cv2.COLOR_BGR2RGB),
+    'bgra8': (4, cv2.COLOR_BGRA2RGB),
+}
+
 
 def imageMsg2Image(img, bridge):
 
@@ -22,6 +30,12 @@ def imageMsg2Image(img, bridge):
         # gray_img_buff = bridge.imgmsg_to_cv2(img, img.encoding)
         # cv_image = depthToRGB8(gray_img_buff, img.encoding)
         pass
+    elif img.encoding in RGB8_CONVERSIONS and img.step == img.width * RGB8_CONVERSIONS[img.encoding][0]:
+        # View the message buffer directly instead of going through CvBridge
+        channels, conversion = RGB8_CONVERSIONS[img.encoding]
+        cv_image = np.frombuffer(img.data, dtype=np.uint8).reshape(img.height, img.width, channels)
+        if conversion is not None:
+            cv_image = cv2.cvtColor(cv_image, conversion)
     else:
         cv_image = bridge.imgmsg_to_cv2(img, "rgb8")
     image.data = cv_image
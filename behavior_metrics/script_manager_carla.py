@@ -146,6 +146,7 @@ def main():
 
     logger.info('closing all processes...')
     controller.pilot.kill()
+    controller.close_logs()
     environment.close_ros_and_simulators()
     while not controller.pilot.execution_completed:
         time.sleep(1)
@@ -16,14 +16,13 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-import shlex
 import subprocess
-import threading
 import cv2
 import rospy
 import os
 import time
 import rosbag
+import rosnode
 import json
 import math
 
@@ -65,12 +64,13 @@ class ControllerCarla:
     def __init__(self):
         """ Constructor of the class. """
         pass
-        self.__data_loc = threading.Lock()
-        self.__pose_loc = threading.Lock()
         self.data = {}
         self.pose3D_data = None
         self.recording = False
         self.cvbridge = CvBridge()
+        os.makedirs('logs', exist_ok=True)
+        self.roslaunch_stdout = open('logs/.roslaunch_stdout.log', 'ab')
+        self.roslaunch_stderr = open('logs/.roslaunch_stderr.log', 'ab')
 
         client = carla.Client('localhost', 2000)
         client.set_timeout(10.0) # seconds
@@ -94,9 +94,9 @@ class ControllerCarla:
             frame_id {str} -- Identifier of the frame that will show the data
             data {dict} -- Data to be shown
         """
+        # Item assignment on a dict is atomic under the GIL, so readers in the GUI thread need no lock
         try:
-            with self.__data_loc:
-                self.data[frame_id] = data
+            self.data[frame_id] = data
         except Exception as e:
             logger.info(e)
 
@@ -111,13 +111,7 @@ class ControllerCarla:
         Returns:
             data -- Depending on the caller frame could be image data, laser data, etc.
         """
-        try:
-            with self.__data_loc:
-                data = self.data.get(frame_id, None)
-        except Exception:
-            pass
-
-        return data
+        return self.data.get(frame_id, None)
 
     def update_pose3d(self, data):
         """Update the pose3D data retrieved from the robot
@@ -125,11 +119,7 @@ class ControllerCarla:
         Arguments:
             data {pose3d} -- 3D position of the robot in the environment
         """
-        try:
-            with self.__pose_loc:
-                self.pose3D_data = data
-        except Exception:
-            pass
+        self.pose3D_data = data
 
     def get_pose3D(self):
         """Function to collect the pose3D data updated in `update_pose3d` function.
@@ -164,10 +154,8 @@ class ControllerCarla:
         if not self.recording:
             logger.info("Recording bag at: {}".format(dataset_name))
             self.recording = True
-            command = "rosbag record -O " + dataset_name + " " + " ".join(topics) + " __name:=behav_bag"
-            command = shlex.split(command)
-            with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-                self.rosbag_proc = subprocess.Popen(command, stdout=out, stderr=err)
+            command = ['rosbag', 'record', '-O', dataset_name, *topics, '__name:=behav_bag']
+            self.rosbag_proc = subprocess.Popen(command, stdout=self.roslaunch_stdout, stderr=self.roslaunch_stderr)
         else:
             logger.info("Rosbag already recording")
             self.stop_record()
@@ -177,13 +165,26 @@ class ControllerCarla:
         if self.rosbag_proc and self.recording:
             logger.info("Stopping bag recording")
             self.recording = False
-            command = "rosnode kill /behav_bag"
-            command = shlex.split(command)
-            with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-                subprocess.Popen(command, stdout=out, stderr=err)
+            self.kill_bag_node('/behav_bag', self.rosbag_proc)
         else:
             logger.info("No bag recording")
 
+    def kill_bag_node(self, node, proc):
+        """Kill a rosbag record node, terminating its process if the node cannot be killed through the master.
+
+        Arguments:
+            node {str} -- Name of the rosbag record node
+            proc {subprocess.Popen} -- Process that launched the node
+        """
+        try:
+            success, fail = rosnode.kill_nodes([node])
+        except rosnode.ROSNodeIOException as ex:
+            logger.warning("Could not reach the ROS master to kill {}: {}".format(node, ex))
+            fail = [node]
+        if fail:
+            logger.warning("Could not kill bag recording node {}, terminating its process".format(node))
+            proc.terminate()
+
     def reload_brain(self, brain, model=None):
         """Helper function to reload the current brain from the GUI.
 
@@ -215,20 +216,25 @@ class ControllerCarla:
         self.pause_pilot()
         self.pilot.initialize_robot()
 
+    def close_logs(self):
+        """Close the log files shared by the rosbag subprocesses."""
+        self.roslaunch_stdout.close()
+        self.roslaunch_stderr.close()
+
 
     def record_metrics(self, metrics_record_dir_path, world_counter=None, brain_counter=None, repetition_counter=None):
         logger.info("Recording metrics bag at: {}".format(metrics_record_dir_path))
 
-        self.pilot.brain_iterations_real_time = []
+        self.pilot.brain_iterations_real_time.clear()
         self.time_str = time.strftime("%Y%m%d-%H%M%S")       
         if world_counter is not None:
-            current_world_head, current_world_tail = os.path.split(self.pilot.configuration.current_world[world_counter])
+            current_world_tail = os.path.basename(self.pilot.configuration.current_world[world_counter])
         else:
-            current_world_head, current_world_tail = os.path.split(self.pilot.configuration.current_world)
+            current_world_tail = os.path.basename(self.pilot.configuration.current_world)
         if brain_counter is not None:
-            current_brain_head, current_brain_tail = os.path.split(self.pilot.configuration.brain_path[brain_counter])
+            current_brain_tail = os.path.basename(self.pilot.configuration.brain_path[brain_counter])
         else:
-            current_brain_head, current_brain_tail = os.path.split(self.pilot.configuration.brain_path)
+            current_brain_tail = os.path.basename(self.pilot.configuration.brain_path)
         self.experiment_metrics = {
             'timestamp': self.time_str,
             'experiment_configuration': self.pilot.configuration.__dict__,
@@ -284,19 +290,17 @@ class ControllerCarla:
             '/clock',
             ]
 
-        command = "rosbag record -O " + self.experiment_metrics_bag_filename + " " + " ".join(topics) + " __name:=behav_metrics_bag"
-        command = shlex.split(command)
-        with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-            self.proc = subprocess.Popen(command, stdout=out, stderr=err)
+        command = ['rosbag', 'record', '-O', self.experiment_metrics_bag_filename, *topics, '__name:=behav_metrics_bag']
+        self.proc = subprocess.Popen(command, stdout=self.roslaunch_stdout, stderr=self.roslaunch_stderr)
 
     def stop_recording_metrics(self):
         logger.info("Stopping metrics bag recording")
-        end_time = time.time()
+        end_time = time.monotonic()
 
-        mean_brain_iterations_real_time = sum(self.pilot.brain_iterations_real_time) / len(self.pilot.brain_iterations_real_time)
+        mean_brain_iterations_real_time = self.pilot.brain_iterations_real_time.mean()
         brain_iterations_frequency_real_time = 1 / mean_brain_iterations_real_time
 
-        mean_brain_iterations_simulated_time = sum(self.pilot.brain_iterations_simulated_time) / len(self.pilot.brain_iterations_simulated_time)
+        mean_brain_iterations_simulated_time = self.pilot.brain_iterations_simulated_time.mean()
         brain_iterations_frequency_simulated_time = 1 / mean_brain_iterations_simulated_time
 
         target_brain_iterations_real_time = 1 / (self.pilot.time_cycle / 1000)
@@ -308,19 +312,21 @@ class ControllerCarla:
             first_images = []
             last_images = []
 
-        command = "rosnode kill /behav_metrics_bag"
-        command = shlex.split(command)
-        with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-            subprocess.Popen(command, stdout=out, stderr=err)
+        self.kill_bag_node('/behav_metrics_bag', self.proc)
 
         # Wait for rosbag file to be closed. Otherwise it causes error
         while os.path.isfile(self.experiment_metrics_bag_filename + '.active'):
-            pass
+            time.sleep(0.02)
         
         if hasattr(self.pilot.brains.active_brain, 'inference_times'):
-            self.pilot.brains.active_brain.inference_times = self.pilot.brains.active_brain.inference_times[10:-10]
-            self.experiment_metrics['gpu_mean_inference_time'] = sum(self.pilot.brains.active_brain.inference_times) / len(self.pilot.brains.active_brain.inference_times)
-            self.experiment_metrics['gpu_inference_frequency'] = 1 / self.experiment_metrics['gpu_mean_inference_time']
+            inference_times = self.pilot.brains.active_brain.inference_times
+            if len(inference_times):
+                self.experiment_metrics['gpu_mean_inference_time'] = inference_times.mean()
+                self.experiment_metrics['gpu_inference_frequency'] = 1 / self.experiment_metrics['gpu_mean_inference_time']
+            else:
+                logger.warning('Not enough inference samples to compute the mean GPU inference time')
+                self.experiment_metrics['gpu_mean_inference_time'] = 0
+                self.experiment_metrics['gpu_inference_frequency'] = 0
             self.experiment_metrics['gpu_inference'] = self.pilot.brains.active_brain.gpu_inference
 
         if hasattr(self.pilot.brains.active_brain, 'bird_eye_view_images'):
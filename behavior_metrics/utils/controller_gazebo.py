@@ -16,14 +16,13 @@ You should have received a copy of the GNU General Public License along with
 this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-import shlex
 import subprocess
-import threading
 import cv2
 import rospy
 import os
 import time
 import rosbag
+import rosnode
 import json
 
 from std_srvs.srv import Empty
@@ -39,6 +38,9 @@ __author__ = 'fqez'
 __contributors__ = []
 __license__ = 'GPLv3'
 
+# Shared by every save_metrics call instead of building a new encoder per json.dumps
+JSON_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
 
 class ControllerGazebo:
     """This class defines the controller of the architecture, responsible of the communication between the logic (model)
@@ -54,12 +56,13 @@ class ControllerGazebo:
     def __init__(self):
         """ Constructor of the class. """
         pass
-        self.__data_loc = threading.Lock()
-        self.__pose_loc = threading.Lock()
         self.data = {}
         self.pose3D_data = None
         self.recording = False
         self.cvbridge = CvBridge()
+        os.makedirs('logs', exist_ok=True)
+        self.roslaunch_stdout = open('logs/.roslaunch_stdout.log', 'ab')
+        self.roslaunch_stderr = open('logs/.roslaunch_stderr.log', 'ab')
 
     # GUI update
     def update_frame(self, frame_id, data):
@@ -71,9 +74,9 @@ class ControllerGazebo:
             frame_id {str} -- Identifier of the frame that will show the data
             data {dict} -- Data to be shown
         """
+        # Item assignment on a dict is atomic under the GIL, so readers in the GUI thread need no lock
         try:
-            with self.__data_loc:
-                self.data[frame_id] = data
+            self.data[frame_id] = data
         except Exception as e:
             logger.info(e)
 
@@ -88,13 +91,7 @@ class ControllerGazebo:
         Returns:
             data -- Depending on the caller frame could be image data, laser data, etc.
         """
-        try:
-            with self.__data_loc:
-                data = self.data.get(frame_id, None)
-        except Exception:
-            pass
-
-        return data
+        return self.data.get(frame_id, None)
 
     def update_pose3d(self, data):
         """Update the pose3D data retrieved from the robot
@@ -102,11 +99,7 @@ class ControllerGazebo:
         Arguments:
             data {pose3d} -- 3D position of the robot in the environment
         """
-        try:
-            with self.__pose_loc:
-                self.pose3D_data = data
-        except Exception:
-            pass
+        self.pose3D_data = data
 
     def get_pose3D(self):
         """Function to collect the pose3D data updated in `update_pose3d` function.
@@ -154,10 +147,8 @@ class ControllerGazebo:
         if not self.recording:
             logger.info("Recording bag at: {}".format(dataset_name))
             self.recording = True
-            command = "rosbag record -O " + dataset_name + " " + " ".join(topics) + " __name:=behav_bag"
-            command = shlex.split(command)
-            with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-                self.rosbag_proc = subprocess.Popen(command, stdout=out, stderr=err)
+            command = ['rosbag', 'record', '-O', dataset_name, *topics, '__name:=behav_bag']
+            self.rosbag_proc = subprocess.Popen(command, stdout=self.roslaunch_stdout, stderr=self.roslaunch_stderr)
         else:
             logger.info("Rosbag already recording")
             self.stop_record()
@@ -167,21 +158,34 @@ class ControllerGazebo:
         if self.rosbag_proc and self.recording:
             logger.info("Stopping bag recording")
             self.recording = False
-            command = "rosnode kill /behav_bag"
-            command = shlex.split(command)
-            with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-                subprocess.Popen(command, stdout=out, stderr=err)
+            self.kill_bag_node('/behav_bag', self.rosbag_proc)
         else:
             logger.info("No bag recording")
 
+    def kill_bag_node(self, node, proc):
+        """Kill a rosbag record node, terminating its process if the node cannot be killed through the master.
+
+        Arguments:
+            node {str} -- Name of the rosbag record node
+            proc {subprocess.Popen} -- Process that launched the node
+        """
+        try:
+            success, fail = rosnode.kill_nodes([node])
+        except rosnode.ROSNodeIOException as ex:
+            logger.warning("Could not reach the ROS master to kill {}: {}".format(node, ex))
+            fail = [node]
+        if fail:
+            logger.warning("Could not kill bag recording node {}, terminating its process".format(node))
+            proc.terminate()
+
     def record_metrics(self, perfect_lap_filename, metrics_record_dir_path, world_counter=None, brain_counter=None, repetition_counter=None):
         logger.info("Recording metrics bag at: {}".format(metrics_record_dir_path))
         self.start_time = datetime.now()
-        current_world_head, current_world_tail = os.path.split(self.pilot.configuration.current_world)
+        current_world_tail = os.path.basename(self.pilot.configuration.current_world)
         if brain_counter is not None:
-            current_brain_head, current_brain_tail = os.path.split(self.pilot.configuration.brain_path[brain_counter])
+            current_brain_tail = os.path.basename(self.pilot.configuration.brain_path[brain_counter])
         else:
-            current_brain_head, current_brain_tail = os.path.split(self.pilot.configuration.brain_path)
+            current_brain_tail = os.path.basename(self.pilot.configuration.brain_path)
         self.experiment_metadata = {
             'world': current_world_tail,
             'brain_path': current_brain_tail,
@@ -206,23 +210,18 @@ class ControllerGazebo:
         time_str = time.strftime("%Y%m%d-%H%M%S")
         self.experiment_metrics_filename = time_str + '.bag'
         topics = ['/F1ROS/odom', '/clock']
-        command = "rosbag record -O " + self.experiment_metrics_filename + " " + " ".join(topics) + " __name:=behav_metrics_bag"
-        command = shlex.split(command)
-        with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-            self.proc = subprocess.Popen(command, stdout=out, stderr=err)
+        command = ['rosbag', 'record', '-O', self.experiment_metrics_filename, *topics, '__name:=behav_metrics_bag']
+        self.proc = subprocess.Popen(command, stdout=self.roslaunch_stdout, stderr=self.roslaunch_stderr)
 
     def stop_recording_metrics(self, pitch_error=False):
         logger.info("Stopping metrics bag recording")
-        end_time = time.time()
+        end_time = time.monotonic()
 
-        command = "rosnode kill /behav_metrics_bag"
-        command = shlex.split(command)
-        with open("logs/.roslaunch_stdout.log", "w") as out, open("logs/.roslaunch_stderr.log", "w") as err:
-            subprocess.Popen(command, stdout=out, stderr=err)
+        self.kill_bag_node('/behav_metrics_bag', self.proc)
 
         # Wait for rosbag file to be closed. Otherwise it causes error
         while os.path.isfile(self.experiment_metrics_filename + '.active'):
-            pass
+            time.sleep(0.02)
 
         perfect_lap_checkpoints, circuit_diameter = metrics_gazebo.read_perfect_lap_rosbag(self.perfect_lap_filename)
         if not pitch_error:
@@ -252,19 +251,20 @@ class ControllerGazebo:
         logger.info("Stopping metrics bag recording")
 
     def save_metrics(self, first_image):
-        experiment_metadata_str = json.dumps(self.experiment_metadata)
-        experiment_metrics_str = json.dumps(self.experiment_metrics)
+        experiment_metadata_str = JSON_ENCODER.encode(self.experiment_metadata)
+        experiment_metrics_str = JSON_ENCODER.encode(self.experiment_metrics)
         with rosbag.Bag(self.experiment_metrics_filename, 'a') as bag:
+            # Every message is stamped at the end of the recording, so the index is only walked once
+            end_time = rospy.Time(bag.get_end_time())
             experiment_metadata_msg = String(data=experiment_metadata_str)
             experiment_metrics_msg = String(data=experiment_metrics_str)
-            bag.write('/metadata', experiment_metadata_msg, rospy.Time(bag.get_end_time()))
-            bag.write('/experiment_metrics', experiment_metrics_msg, rospy.Time(bag.get_end_time()))
+            bag.write('/metadata', experiment_metadata_msg, end_time)
+            bag.write('/experiment_metrics', experiment_metrics_msg, end_time)
             if first_image is not None and first_image.shape == (480, 640, 3):
                 rospy.loginfo('Image received and sent to /first_image')
-                bag.write('/first_image', self.cvbridge.cv2_to_imgmsg(first_image), rospy.Time(bag.get_end_time()))
+                bag.write('/first_image', self.cvbridge.cv2_to_imgmsg(first_image), end_time)
             else:
                 rospy.loginfo('Error: Image Broken and /first_image Skipped: {}'.format(first_image))
-        bag.close()
 
     def reload_brain(self, brain, model=None):
         """Helper function to reload the current brain from the GUI.
@@ -296,3 +296,8 @@ class ControllerGazebo:
     def initialize_robot(self):
         self.pause_pilot()
         self.pilot.initialize_robot()
+
+    def close_logs(self):
+        """Close the log files shared by the rosbag subprocesses."""
+        self.roslaunch_stdout.close()
+        self.roslaunch_stderr.close()
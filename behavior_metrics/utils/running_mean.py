@@ -0,0 +1,53 @@
+from collections import deque
+
+
+class RunningMean:
+    """Running mean of the float samples collected on every pilot iteration.
+
+    Only the number of samples and their sum are kept, so memory stays constant however long the experiment runs.
+    The first `skip_first` and last `skip_last` samples can be left out of the mean (e.g. network warm-up); the last
+    ones are held back in a small queue until newer samples push them into the sum.
+
+    Attributes:
+        count {int} -- Number of samples in the mean
+        total {float} -- Sum of the samples in the mean
+        last {float} -- Latest sample appended, None if empty
+    """
+
+    def __init__(self, skip_first=0, skip_last=0):
+        """Constructor of the class
+
+        Arguments:
+            skip_first {int} -- Number of leading samples left out of the mean (default: {0})
+            skip_last {int} -- Number of trailing samples left out of the mean (default: {0})
+        """
+        self.skip_first = skip_first
+        self.skip_last = skip_last
+        self.pending = deque()
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.last = value
+        self.appended += 1
+        if self.appended <= self.skip_first:
+            return
+        if self.skip_last:
+            self.pending.append(value)
+            if len(self.pending) <= self.skip_last:
+                return
+            value = self.pending.popleft()
+        self.count += 1
+        self.total += value
+
+    def clear(self):
+        self.appended = 0
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+        self.pending.clear()
+
+    def mean(self):
+        return self.total / self.count
@@ -30,7 +30,6 @@ from utils.logger import logger
 from utils.constants import MIN_EXPERIMENT_PERCENTAGE_COMPLETED, CIRCUITS_TIMEOUTS
 from pilot_gazebo import PilotGazebo
 from utils.tmp_world_generator import tmp_world_generator
-from rosgraph_msgs.msg import Clock
 
 
 def run_brains_worlds(app_configuration, controller, randomize=False):
@@ -110,6 +109,7 @@ def run_brains_worlds(app_configuration, controller, randomize=False):
                 while not controller.pilot.execution_completed:
                     time.sleep(1)
     controller.stop_pilot()
+    controller.close_logs()
 
 
 def is_trapped(old_point, new_point):